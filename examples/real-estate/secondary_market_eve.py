@@ -10,13 +10,25 @@ span multiple agents/services inside a single vertical.
 from __future__ import annotations
 
 import asyncio
+import atexit
+import bisect
+import contextlib
+import itertools
+import logging
+import logging.handlers
 import os
+import queue
+import re
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+import orjson
 import stripe
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 try:  # pragma: no cover - support running as module or script
@@ -78,18 +90,67 @@ class MarketplaceListing(BaseModel):
 
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
+# Investor notifications are coalesced into bulk sends: the dispatcher waits
+# this long after the first queued notification, then ships up to a batch.
+NOTIFY_BATCH_WINDOW = 0.05
+NOTIFY_BATCH_SIZE = 64
+
+# Notification logs go through a queue drained by a listener thread, so the
+# event loop never blocks on stdout.
+logger = logging.getLogger(__name__)
+_log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener_running = False
+logger.addHandler(_log_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def _start_log_listener() -> None:
+    global _log_listener_running
+    if not _log_listener_running:
+        _log_listener.start()
+        _log_listener_running = True
+
+
+def _stop_log_listener() -> None:
+    # stop() drains every queued record before the listener thread exits.
+    global _log_listener_running
+    if _log_listener_running:
+        _log_listener.stop()
+        _log_listener_running = False
+
+
+atexit.register(_stop_log_listener)
+
+HOT_MARKETS_RE = re.compile(r"austin|dallas|houston|atlanta|phoenix", re.IGNORECASE)
+
 app = FastAPI(
     title="Secondary Market Eve",
     description="Autonomous real-estate lead monetization platform",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 
 class SecondaryMarketEve:
     def __init__(self):
         self.investors: Dict[str, InvestorProfile] = {}
+        # Inverted indexes so lead matching only visits plausible investors.
+        self._investors_by_market: Dict[str, Set[str]] = defaultdict(set)
+        self._investors_by_property_type: Dict[str, Set[str]] = defaultdict(set)
         self.lead_packages: Dict[str, LeadPackage] = {}
         self.marketplace_listings: Dict[str, MarketplaceListing] = {}
+        # /marketplace ordering (highest distress first, then insertion order)
+        # and per-listing JSON are maintained on write, so a rebuild is just a
+        # bytes join rather than a sort + re-encode.
+        self._listing_order: List[Tuple[float, int, str]] = []
+        self._listing_keys: Dict[str, Tuple[float, int, str]] = {}
+        self._listing_bytes: Dict[str, bytes] = {}
+        self._listing_seq = itertools.count()
+        self._marketplace_cache_bytes: Optional[bytes] = None
+        self._marketplace_dirty = True
         self.revenue_metrics: Dict[str, float] = {
             "total_sales": 0,
             "packages_sold": 0,
@@ -98,6 +159,37 @@ class SecondaryMarketEve:
             "monthly_recurring": 0,
         }
         self.pricing_ai = self._initialize_pricing()
+        self._base_prices: Dict[LeadTier, int] = self.pricing_ai["base_prices"]
+        # Created by start_notification_dispatcher on the running loop, so an
+        # app restarted on a new loop never touches a queue bound to the old one.
+        self.notification_queue: Optional[
+            asyncio.Queue[Tuple[InvestorProfile, Dict[str, Any]]]
+        ] = None
+        self._notification_dispatcher: Optional[asyncio.Task] = None
+
+    def register_investor(self, investor: InvestorProfile) -> None:
+        previous = self.investors.get(investor.investor_id)
+        if previous is not None:
+            self._unindex_investor(previous)
+        self.investors[investor.investor_id] = investor
+        for market in investor.preferred_markets:
+            self._investors_by_market[market.lower()].add(investor.investor_id)
+        for property_type in investor.property_types:
+            self._investors_by_property_type[property_type].add(investor.investor_id)
+
+    def _unindex_investor(self, investor: InvestorProfile) -> None:
+        for market in investor.preferred_markets:
+            bucket = self._investors_by_market.get(market.lower())
+            if bucket is not None:
+                bucket.discard(investor.investor_id)
+                if not bucket:
+                    del self._investors_by_market[market.lower()]
+        for property_type in investor.property_types:
+            bucket = self._investors_by_property_type.get(property_type)
+            if bucket is not None:
+                bucket.discard(investor.investor_id)
+                if not bucket:
+                    del self._investors_by_property_type[property_type]
 
     def _initialize_pricing(self) -> Dict[str, Any]:
         return {
@@ -121,9 +213,10 @@ class SecondaryMarketEve:
             return None
 
         tier = self._classify_lead_tier(property_intel)
-        base_price = self.pricing_ai["base_prices"][tier]
+        base_price = self._base_prices[tier]
         final_price = base_price * self._calculate_market_multiplier(property_intel.property.neighborhood)
-        package_id = f"PKG_{property_intel.property.zpid}_{int(datetime.now().timestamp())}"
+        now = datetime.now()
+        package_id = f"PKG_{property_intel.property.zpid}_{time.time_ns()}"
 
         package = LeadPackage(
             package_id=package_id,
@@ -135,8 +228,8 @@ class SecondaryMarketEve:
             market_comps_included=tier != LeadTier.BRONZE,
             roi_projection=property_intel.investment_opportunity,
             exclusive_period_hours=24 if tier == LeadTier.PLATINUM else 12,
-            created_at=datetime.now(),
-            expires_at=datetime.now() + timedelta(days=7),
+            created_at=now,
+            expires_at=now + timedelta(days=7),
         )
         self.lead_packages[package_id] = package
         await asyncio.gather(
@@ -160,10 +253,7 @@ class SecondaryMarketEve:
         return LeadTier.BRONZE
 
     def _calculate_market_multiplier(self, neighborhood: str) -> float:
-        hot_markets = {"austin", "dallas", "houston", "atlanta", "phoenix"}
-        if any(city in neighborhood.lower() for city in hot_markets):
-            return 1.5
-        return 1.0
+        return 1.5 if HOT_MARKETS_RE.search(neighborhood) else 1.0
 
     async def _create_marketplace_listing(self, package: LeadPackage) -> None:
         prop = package.property_intelligence.property
@@ -189,21 +279,44 @@ class SecondaryMarketEve:
             },
             full_package_id=package.package_id,
         )
+        self._add_to_marketplace(listing)
+
+    def _add_to_marketplace(self, listing: MarketplaceListing) -> None:
+        if listing.listing_id in self.marketplace_listings:
+            self._drop_listing(listing.listing_id)
+        key = (-listing.distress_score, next(self._listing_seq), listing.listing_id)
+        bisect.insort(self._listing_order, key)
+        self._listing_keys[listing.listing_id] = key
+        self._listing_bytes[listing.listing_id] = orjson.dumps(listing.model_dump())
         self.marketplace_listings[listing.listing_id] = listing
+        self._marketplace_dirty = True
+
+    def _drop_listing(self, listing_id: str) -> None:
+        key = self._listing_keys.pop(listing_id)
+        del self._listing_order[bisect.bisect_left(self._listing_order, key)]
+        del self._listing_bytes[listing_id]
+        del self.marketplace_listings[listing_id]
+        self._marketplace_dirty = True
 
     async def _match_with_investors(self, package: LeadPackage) -> None:
         prop = package.property_intelligence.property
+        type_candidates = self._investors_by_property_type.get(prop.property_type)
+        if not type_candidates:
+            return
+        address = prop.address.lower()
+        candidates: Set[str] = set()
+        for market, investor_ids in self._investors_by_market.items():
+            if market in address:
+                candidates |= investor_ids
+        candidates &= type_candidates
+
         matches = []
-        for investor in self.investors.values():
-            if not any(market.lower() in prop.address.lower() for market in investor.preferred_markets):
-                continue
+        for investor_id in candidates:
+            investor = self.investors[investor_id]
             if prop.price < investor.price_range["min"] or prop.price > investor.price_range["max"]:
                 continue
-            if prop.property_type not in investor.property_types:
-                continue
             matches.append(investor)
-        for investor in matches:
-            await self._notify_investor(investor, package)
+        await asyncio.gather(*(self._notify_investor(investor, package) for investor in matches))
 
     async def _notify_investor(self, investor: InvestorProfile, package: LeadPackage) -> None:
         payload = {
@@ -213,9 +326,62 @@ class SecondaryMarketEve:
             "price": package.price,
             "distress_score": package.property_intelligence.distress_signals.overall_score,
         }
-        print(f"📧 Email to {investor.email}: {payload}")
-        if investor.phone:
-            print(f"📱 SMS to {investor.phone}: {payload}")
+        # Started lazily so notifications still go out when the class is used
+        # outside the FastAPI lifecycle.
+        self.start_notification_dispatcher()
+        assert self.notification_queue is not None
+        await self.notification_queue.put((investor, payload))
+
+    def start_notification_dispatcher(self) -> None:
+        _start_log_listener()
+        if self._notification_dispatcher is None or self._notification_dispatcher.done():
+            self.notification_queue = asyncio.Queue()
+            self._notification_dispatcher = asyncio.create_task(
+                self._dispatch_notifications(self.notification_queue)
+            )
+
+    async def stop_notification_dispatcher(self) -> None:
+        if self._notification_dispatcher is not None:
+            self._notification_dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._notification_dispatcher
+            self._notification_dispatcher = None
+
+    async def _dispatch_notifications(
+        self, notifications: asyncio.Queue[Tuple[InvestorProfile, Dict[str, Any]]]
+    ) -> None:
+        batch: List[Tuple[InvestorProfile, Dict[str, Any]]] = []
+        try:
+            while True:
+                batch = [await notifications.get()]
+                await asyncio.sleep(NOTIFY_BATCH_WINDOW)
+                while len(batch) < NOTIFY_BATCH_SIZE:
+                    try:
+                        batch.append(notifications.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                await self._send_bulk_notifications(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Shutdown: deliver the batch in hand plus anything still queued
+            # before the dispatcher exits.
+            while True:
+                try:
+                    batch.append(notifications.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            for start in range(0, len(batch), NOTIFY_BATCH_SIZE):
+                await self._send_bulk_notifications(batch[start : start + NOTIFY_BATCH_SIZE])
+            raise
+
+    async def _send_bulk_notifications(
+        self, batch: List[Tuple[InvestorProfile, Dict[str, Any]]]
+    ) -> None:
+        for investor, payload in batch:
+            rendered = orjson.dumps(payload).decode()
+            logger.info("📧 Email to %s: %s", investor.email, rendered)
+            if investor.phone:
+                logger.info("📱 SMS to %s: %s", investor.phone, rendered)
 
     async def process_purchase(
         self, investor_id: str, package_id: str, payment_method_id: str
@@ -230,7 +396,9 @@ class SecondaryMarketEve:
         if not stripe.api_key:
             raise HTTPException(status_code=500, detail="Stripe key missing")
 
-        payment_intent = stripe.PaymentIntent.create(
+        # The Stripe SDK is synchronous; run it in a thread so the loop keeps serving.
+        payment_intent = await asyncio.to_thread(
+            stripe.PaymentIntent.create,
             amount=int(package.price * 100),
             currency="usd",
             payment_method=payment_method_id,
@@ -255,7 +423,7 @@ class SecondaryMarketEve:
 
     async def _prepare_full_package(self, package: LeadPackage) -> Dict[str, Any]:
         return {
-            "property_details": package.property_intelligence.dict(),
+            "property_details": package.property_intelligence.model_dump(),
             "geometric_analysis": package.property_intelligence.geometric_analysis
             if package.geometric_analysis_included
             else None,
@@ -267,16 +435,39 @@ class SecondaryMarketEve:
     def _remove_from_marketplace(self, package_id: str) -> None:
         for listing_id, listing in list(self.marketplace_listings.items()):
             if listing.full_package_id == package_id:
-                del self.marketplace_listings[listing_id]
+                self._drop_listing(listing_id)
                 break
 
+    def marketplace_listings_json(self) -> bytes:
+        if self._marketplace_dirty or self._marketplace_cache_bytes is None:
+            self._marketplace_cache_bytes = b"[%b]" % b",".join(
+                self._listing_bytes[listing_id] for _, _, listing_id in self._listing_order
+            )
+            self._marketplace_dirty = False
+        return self._marketplace_cache_bytes
+
 
 secondary_eve = SecondaryMarketEve()
 
 
+@app.on_event("startup")
+async def start_notification_dispatcher() -> None:
+    secondary_eve.start_notification_dispatcher()
+
+
+@app.on_event("shutdown")
+async def stop_notification_dispatcher() -> None:
+    await secondary_eve.stop_notification_dispatcher()
+
+
+@app.on_event("shutdown")
+async def stop_notification_logging() -> None:
+    _stop_log_listener()
+
+
 @app.post("/register-investor")
 async def register_investor(investor: InvestorProfile):
-    secondary_eve.investors[investor.investor_id] = investor
+    secondary_eve.register_investor(investor)
     return {
         "registration_successful": True,
         "investor_id": investor.investor_id,
@@ -299,16 +490,13 @@ async def process_overflow_lead(payload: PropertyIntelligence):
 
 @app.get("/marketplace")
 async def marketplace():
-    listings = sorted(
-        secondary_eve.marketplace_listings.values(),
-        key=lambda item: item.distress_score,
-        reverse=True,
+    # Revenue metrics change on every sale, so only the listings are cached.
+    body = b'{"total_listings":%d,"listings":%b,"revenue_metrics":%b}' % (
+        len(secondary_eve.marketplace_listings),
+        secondary_eve.marketplace_listings_json(),
+        orjson.dumps(secondary_eve.revenue_metrics),
     )
-    return {
-        "total_listings": len(listings),
-        "listings": [listing.dict() for listing in listings],
-        "revenue_metrics": secondary_eve.revenue_metrics,
-    }
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/purchase-lead")
@@ -332,4 +520,6 @@ async def revenue_dashboard():
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=5053)
+    # Investors, packages and listings live in process memory, so this service
+    # must stay single-worker.
+    uvicorn.run(app, host="0.0.0.0", port=5053, loop="uvloop", http="httptools")
@@ -12,18 +12,27 @@ as an external MCP/tool without having to know the scraping mechanics.
 
 from __future__ import annotations
 
-import base64
+import asyncio
 import json
+import logging
+import multiprocessing
 import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from io import BytesIO
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import aiohttp
 import numpy as np
-import requests
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from openai import OpenAI
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator, model_validator
 
 # -----------------------------------------------------------------------------
 # Optional Eternal Lattice dependency with a safety fallback so the demo still
@@ -39,6 +48,9 @@ except ImportError:  # pragma: no cover - fallback for demo environments
         def __init__(self, *_, **__):
             self.rand = np.random.default_rng(seed=42)
 
+        def reseed(self, seed):
+            self.rand = np.random.default_rng(seed=seed)
+
         def extract_landmarks(self):
             points = self.rand.random((32, 2))
             return points
@@ -57,8 +69,28 @@ except ImportError:  # pragma: no cover - fallback for demo environments
             return {"status": "stubbed", "heads": 4, "layers": 2}
 
 
+logger = logging.getLogger(__name__)
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+PHOTO_FETCH_TIMEOUT = aiohttp.ClientTimeout(total=10)
+PHOTO_FETCH_RETRIES = 2
+PHOTO_FETCH_BACKOFF = 0.2
+
+# Each uvicorn worker owns a lattice process pool, so the pools split the CPUs
+# between them rather than each claiming all of them.
+ZILLOW_WORKERS = max(1, int(os.getenv("REALESTATE_ZILLOW_WORKERS", "1")))
+LATTICE_PROCESSES = max(
+    1,
+    int(os.getenv("REALESTATE_LATTICE_PROCESSES", (os.cpu_count() or 1) // ZILLOW_WORKERS)),
+)
+
+SCRAPE_CACHE_TTL = 600
+SCRAPE_CACHE_SIZE = 256
+ScrapeKey = Tuple[str, int, int, str]  # location, min_price, max_price, property_type
+
+DISTRESS_KEYWORDS_RE = re.compile(r"foreclosure|as-is|distress", re.IGNORECASE)
+
 
 class ZillowProperty(BaseModel):
     zpid: str
@@ -79,6 +111,30 @@ class ZillowProperty(BaseModel):
     zestimate: Optional[int] = None
     rent_zestimate: Optional[int] = None
 
+    # Flags are recomputed on validation, assignment and model_copy(update=...)
+    model_config = ConfigDict(validate_assignment=True)
+
+    _has_price_reduction: bool = PrivateAttr(default=False)
+    _has_distress_keywords: bool = PrivateAttr(default=False)
+
+    @model_validator(mode="after")
+    def _compute_distress_flags(self) -> ZillowProperty:
+        self._has_price_reduction = any("reduction" in str(change).lower() for change in self.price_history)
+        self._has_distress_keywords = DISTRESS_KEYWORDS_RE.search(self.description) is not None
+        return self
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> ZillowProperty:
+        copied = super().model_copy(update=update, deep=deep)
+        return copied._compute_distress_flags() if update else copied
+
+    @property
+    def has_price_reduction(self) -> bool:
+        return self._has_price_reduction
+
+    @property
+    def has_distress_keywords(self) -> bool:
+        return self._has_distress_keywords
+
 
 class PropertyAnalysisRequest(BaseModel):
     location: str = "Austin, TX"
@@ -100,6 +156,18 @@ class DistressSignal(BaseModel):
     overall_score: float
 
 
+def _to_builtin(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: _to_builtin(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(item) for item in value]
+    return value
+
+
 class PropertyIntelligence(BaseModel):
     property: ZillowProperty
     distress_signals: DistressSignal
@@ -108,11 +176,19 @@ class PropertyIntelligence(BaseModel):
     investment_opportunity: Dict[str, Any]
     contract_recommendation: str
 
+    @field_validator("geometric_analysis")
+    @classmethod
+    def _plain_geometric_analysis(cls, value: Dict[str, Any]) -> Dict[str, Any]:
+        # Shared contract with secondary_market_eve: hold only JSON-native values
+        # so model_dump_json, jsonable_encoder and json.dumps all keep working.
+        return _to_builtin(value)
+
 
 app = FastAPI(
     title="Zillow Visual Property Scraper",
     description="Autonomous real estate acquisition through geometric property analysis",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 lattice = TriadGATGraphRAG(
@@ -129,11 +205,67 @@ lattice = TriadGATGraphRAG(
 )
 
 
+_lattice_lock = threading.Lock()
+
+
+def _run_lattice_pipeline(photo_url: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Landmarks -> curvature -> embedding for one photo.
+
+    Module-level so it can be pickled into the lattice process pool; each worker
+    process uses its own copy of the module's ``lattice``. Backends that expose
+    ``reseed`` are seeded from the photo URL, so a photo gets the same result
+    whichever process (or thread, without a pool) analyzes it.
+    """
+    with _lattice_lock:
+        reseed = getattr(lattice, "reseed", None)
+        if reseed is not None:
+            reseed(zlib.crc32(photo_url.encode()))
+        landmarks = np.ascontiguousarray(lattice.extract_landmarks())
+        curvatures = np.ascontiguousarray(lattice.compute_curvature(landmarks))
+        embedding, _ = lattice.embed_graph(lattice.forge_graph(landmarks))
+    return landmarks, curvatures, np.asarray(embedding)
+
+
 class ZillowVisualScraper:
     def __init__(self):
         self.lattice = lattice
         self.property_cache: Dict[str, PropertyIntelligence] = {}
         self.analysis_history: List[str] = []
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # Caps concurrent property analyses so we don't hammer the photo CDN.
+        self.analysis_slots = asyncio.Semaphore(8)
+        # CPU-bound lattice work runs here; falls back to the loop's default
+        # thread pool when the app lifecycle hasn't created it.
+        self.lattice_pool: Optional[ProcessPoolExecutor] = None
+        # GPT scrape results keyed by the prompt inputs: finished results are
+        # reused for SCRAPE_CACHE_TTL seconds, and concurrent identical
+        # requests share the single in-flight call.
+        self._scrape_cache: Dict[ScrapeKey, Tuple[float, List[ZillowProperty]]] = {}
+        self._scrape_inflight: Dict[ScrapeKey, asyncio.Task] = {}
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        # Normally opened by the app startup hook; created lazily so the scraper
+        # also works when driven outside of the FastAPI lifecycle.
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = _create_http_session()
+        return self.http_session
+
+    async def _fetch_photo(self, url: str) -> bytes:
+        session = self._get_http_session()
+        attempt = 0
+        while True:
+            try:
+                async with session.get(url, timeout=PHOTO_FETCH_TIMEOUT) as response:
+                    response.raise_for_status()
+                    return await response.read()
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # Transient connection/read failures get a short exponential backoff.
+                if attempt >= PHOTO_FETCH_RETRIES:
+                    raise
+                await asyncio.sleep(PHOTO_FETCH_BACKOFF * 2**attempt)
+                attempt += 1
 
     async def scrape_properties_via_gpt(
         self, request: PropertyAnalysisRequest
@@ -141,6 +273,33 @@ class ZillowVisualScraper:
         if not os.getenv("OPENAI_API_KEY"):
             raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
 
+        key = (request.location, request.min_price, request.max_price, request.property_type)
+        cached = self._scrape_cache.get(key)
+        if cached is not None:
+            expires_at, properties = cached
+            if expires_at > time.monotonic():
+                return properties
+            del self._scrape_cache[key]
+
+        task = self._scrape_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_properties_from_gpt(request))
+            self._scrape_inflight[key] = task
+            task.add_done_callback(partial(self._finish_scrape, key))
+        # Shielded so one caller disconnecting doesn't cancel the shared call.
+        return await asyncio.shield(task)
+
+    def _finish_scrape(self, key: ScrapeKey, task: asyncio.Task) -> None:
+        self._scrape_inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._scrape_cache[key] = (time.monotonic() + SCRAPE_CACHE_TTL, task.result())
+        while len(self._scrape_cache) > SCRAPE_CACHE_SIZE:
+            del self._scrape_cache[next(iter(self._scrape_cache))]
+
+    async def _request_properties_from_gpt(
+        self, request: PropertyAnalysisRequest
+    ) -> List[ZillowProperty]:
         prompt = (
             "You have Zillow access. Produce JSON with a top-level "
             "'properties' array for listings that might be distressed.\n"
@@ -154,7 +313,9 @@ class ZillowVisualScraper:
         )
 
         try:
-            response = client.responses.create(
+            # The OpenAI client is synchronous; keep it off the event loop.
+            response = await asyncio.to_thread(
+                client.responses.create,
                 model="gpt-4o-mini",
                 input=[
                     {
@@ -199,63 +360,100 @@ class ZillowVisualScraper:
         if not photo_urls:
             return {"visual_analysis": [], "overall_visual_score": 0.0}
 
-        analyses = []
-        for index, url in enumerate(photo_urls[:3]):
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-            except requests.RequestException:
-                continue
+        # Fetch concurrently so the stage costs the slowest download, not the sum.
+        results = await asyncio.gather(
+            *(self._fetch_photo(url) for url in photo_urls[:3]),
+            return_exceptions=True,
+        )
 
-            img_bytes = BytesIO(response.content)
-            _ = base64.b64encode(img_bytes.read())  # placeholder for future use
-
-            landmarks = self.lattice.extract_landmarks()
-            curvatures = self.lattice.compute_curvature(landmarks)
-            embedding, _ = self.lattice.embed_graph(self.lattice.forge_graph(landmarks))
-
-            analyses.append(
-                {
-                    "photo_index": index,
-                    "landmarks": landmarks.tolist(),
-                    "curvatures": curvatures.tolist(),
-                    "embedding_preview": embedding[:10].tolist(),
-                    "distress_indicators": {
-                        "high_curvature_regions": int((curvatures > 0.7).sum()),
-                        "irregular_geometry": float(curvatures.std()),
-                        "visual_complexity": len(landmarks),
-                    },
-                }
+        photo_indices = [
+            index for index, content in enumerate(results) if not isinstance(content, BaseException)
+        ]
+        loop = asyncio.get_running_loop()
+        pipelines = await asyncio.gather(
+            *(
+                loop.run_in_executor(self.lattice_pool, _run_lattice_pipeline, photo_urls[index])
+                for index in photo_indices
+            )
+        )
+
+        landmark_sets: List[np.ndarray] = []
+        curvature_sets: List[np.ndarray] = []
+        embedding_previews: List[np.ndarray] = []
+        for landmarks, curvatures, embedding in pipelines:
+            landmark_sets.append(landmarks)
+            curvature_sets.append(curvatures)
+            embedding_previews.append(np.ascontiguousarray(embedding[:10]))
+
+        if not photo_indices:
+            return {"visual_analysis": [], "overall_visual_score": 0.0, "geometric_summary": {}}
+
+        # One (photos, K) curvature matrix instead of per-photo dicts, so the
+        # indicators, score and summary are each a single vectorized pass.
+        # The arrays are only converted to lists at the PropertyIntelligence
+        # boundary (see _plain_geometric_analysis). The payload keeps each
+        # backend's curvature shape; only the statistics use flattened views.
+        curvature_rows = [curvatures.ravel() for curvatures in curvature_sets]
+        if len({row.size for row in curvature_rows}) == 1:
+            curvature_values = np.stack(curvature_rows)
+            high_curvature = np.count_nonzero(curvature_values > 0.7, axis=1)
+            irregularity = curvature_values.std(axis=1)
+        else:
+            # Lattice backends aren't required to return a fixed number of
+            # curvatures per photo; reduce row by row when the lengths differ.
+            curvature_values = np.concatenate(curvature_rows)
+            high_curvature = np.fromiter(
+                (np.count_nonzero(row > 0.7) for row in curvature_rows),
+                dtype=np.int64,
+                count=len(curvature_rows),
+            )
+            irregularity = np.fromiter(
+                (row.std() for row in curvature_rows), dtype=np.float64, count=len(curvature_rows)
             )
+        complexity = np.fromiter(
+            (len(landmarks) for landmarks in landmark_sets), dtype=np.int64, count=len(landmark_sets)
+        )
+
+        analyses = [
+            {
+                "photo_index": index,
+                "landmarks": landmark_sets[row],
+                "curvatures": curvature_sets[row],
+                "embedding_preview": embedding_previews[row],
+                "distress_indicators": {
+                    "high_curvature_regions": int(high_curvature[row]),
+                    "irregular_geometry": float(irregularity[row]),
+                    "visual_complexity": int(complexity[row]),
+                },
+            }
+            for row, index in enumerate(photo_indices)
+        ]
 
         return {
             "visual_analysis": analyses,
-            "overall_visual_score": self._calculate_visual_distress_score(analyses),
-            "geometric_summary": self._summarize_geometric_features(analyses),
+            "overall_visual_score": self._calculate_visual_distress_score(
+                high_curvature, irregularity, complexity
+            ),
+            "geometric_summary": self._summarize_geometric_features(curvature_values),
         }
 
-    def _calculate_visual_distress_score(self, analyses: List[Dict[str, Any]]) -> float:
-        if not analyses:
+    def _calculate_visual_distress_score(
+        self, high_curvature: np.ndarray, irregularity: np.ndarray, complexity: np.ndarray
+    ) -> float:
+        if not high_curvature.size:
             return 0.0
-        total = 0.0
-        for item in analyses:
-            distress = item["distress_indicators"]
-            total += (
-                distress["high_curvature_regions"] * 10
-                + distress["irregular_geometry"] * 20
-                + min(distress["visual_complexity"] / 10, 5)
-            )
-        return min(total / len(analyses), 100.0)
+        scores = high_curvature * 10 + irregularity * 20 + np.minimum(complexity / 10, 5)
+        return min(float(scores.mean()), 100.0)
 
-    def _summarize_geometric_features(self, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not analyses:
+    def _summarize_geometric_features(self, curvatures: np.ndarray) -> Dict[str, Any]:
+        if not curvatures.size:
             return {}
-        curvatures = np.concatenate([np.array(a["curvatures"]) for a in analyses])
+        variance = float(curvatures.var())
         return {
             "avg_curvature": float(curvatures.mean()),
             "max_curvature": float(curvatures.max()),
-            "curvature_variance": float(curvatures.var()),
-            "geometric_complexity": float(curvatures.var()) + len(curvatures),
+            "curvature_variance": variance,
+            "geometric_complexity": variance + curvatures.size,
         }
 
     async def detect_distress_signals(
@@ -265,12 +463,9 @@ class ZillowVisualScraper:
             property.zestimate and property.price < property.zestimate * 0.85
         )
         high_days_on_market = property.days_on_market > 60
-        price_reduction = any("reduction" in str(change).lower() for change in property.price_history)
+        price_reduction = property.has_price_reduction
         visual_distress = visual.get("overall_visual_score", 0) > 50
-        neighborhood_decline = any(
-            keyword in property.description.lower()
-            for keyword in ["foreclosure", "as-is", "distress"]
-        )
+        neighborhood_decline = property.has_distress_keywords
         geometric_anomaly = visual.get("geometric_summary", {}).get("geometric_complexity", 0) > 100
 
         signals = [
@@ -321,44 +516,126 @@ class ZillowVisualScraper:
         }
 
 
+def _create_http_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=100,
+        limit_per_host=20,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
 scraper = ZillowVisualScraper()
 
 
-@app.post("/scrape-properties")
-async def scrape_properties(request: PropertyAnalysisRequest) -> Dict[str, Any]:
-    properties = await scraper.scrape_properties_via_gpt(request)
-    analyzed: List[PropertyIntelligence] = []
-    for prop in properties[:10]:
+@app.on_event("startup")
+async def open_http_session() -> None:
+    scraper.http_session = _create_http_session()
+
+
+@app.on_event("startup")
+async def start_lattice_pool() -> None:
+    # spawn, not fork: the server process already runs threads (to_thread,
+    # aiohttp's resolver) and forking it can deadlock the children.
+    scraper.lattice_pool = ProcessPoolExecutor(
+        max_workers=LATTICE_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@app.on_event("shutdown")
+async def close_http_session() -> None:
+    if scraper.http_session is not None:
+        await scraper.http_session.close()
+        scraper.http_session = None
+
+
+@app.on_event("shutdown")
+async def stop_lattice_pool() -> None:
+    if scraper.lattice_pool is not None:
+        # Don't block the event loop waiting for in-flight lattice work.
+        scraper.lattice_pool.shutdown(wait=False, cancel_futures=True)
+        scraper.lattice_pool = None
+
+
+async def _analyze_one(prop: ZillowProperty) -> PropertyIntelligence:
+    async with scraper.analysis_slots:
         visual = await scraper.analyze_property_photos(prop.photos)
         distress = await scraper.detect_distress_signals(prop, visual)
         investment = await scraper.generate_investment_analysis(prop, distress)
-        contract_rec = "IMMEDIATE_OFFER" if distress.overall_score > 70 else "WATCH_LIST"
-        analyzed.append(
-            PropertyIntelligence(
-                property=prop,
-                distress_signals=distress,
-                geometric_analysis=visual,
-                market_position={
-                    "price_ratio": prop.price / prop.zestimate if prop.zestimate else 1.0,
-                    "market_time": prop.days_on_market,
-                    "competition_level": "LOW" if prop.days_on_market > 60 else "HIGH",
-                },
-                investment_opportunity=investment,
-                contract_recommendation=contract_rec,
-            )
-        )
+    contract_rec = "IMMEDIATE_OFFER" if distress.overall_score > 70 else "WATCH_LIST"
+    return PropertyIntelligence(
+        property=prop,
+        distress_signals=distress,
+        geometric_analysis=visual,
+        market_position={
+            "price_ratio": prop.price / prop.zestimate if prop.zestimate else 1.0,
+            "market_time": prop.days_on_market,
+            "competition_level": "LOW" if prop.days_on_market > 60 else "HIGH",
+        },
+        investment_opportunity=investment,
+        contract_recommendation=contract_rec,
+    )
+
+
+@app.post("/scrape-properties")
+async def scrape_properties(request: PropertyAnalysisRequest) -> StreamingResponse:
+    properties = await scraper.scrape_properties_via_gpt(request)
+    candidates = properties[:10]
+    results = await asyncio.gather(
+        *(_analyze_one(prop) for prop in candidates),
+        return_exceptions=True,
+    )
+    analyzed: List[PropertyIntelligence] = []
+    for prop, result in zip(candidates, results):
+        if isinstance(result, BaseException):
+            # One bad listing shouldn't fail the batch, but it must not vanish silently.
+            logger.error("Dropping property zpid=%s: analysis failed", prop.zpid, exc_info=result)
+            continue
+        analyzed.append(result)
 
     analyzed.sort(key=lambda a: a.distress_signals.overall_score, reverse=True)
-    scraper.analysis_history.append(datetime.now().isoformat())
+    analysis_timestamp = datetime.now().isoformat()
+    scraper.analysis_history.append(analysis_timestamp)
+
+    diagnostics = lattice.get_triad_diagnostics()
+
+    # Properties are encoded one at a time as the body streams, so only a single
+    # serialized property is held at once. The 200 is already sent by then, so a
+    # property that fails to encode is logged and skipped rather than cutting
+    # the body short; the counts go last so they match what was actually sent.
+    def _stream_body() -> Iterator[bytes]:
+        yield b'{"properties":['
+        sent = 0
+        high_priority = 0
+        for item in analyzed:
+            try:
+                encoded = orjson.dumps(item.model_dump(), option=orjson.OPT_SERIALIZE_NUMPY)
+            except Exception:
+                logger.exception(
+                    "Dropping property zpid=%s from response: encoding failed", item.property.zpid
+                )
+                continue
+            if sent:
+                yield b","
+            yield encoded
+            sent += 1
+            if item.distress_signals.overall_score > 70:
+                high_priority += 1
+        summary = orjson.dumps(
+            {
+                "total_properties_found": len(properties),
+                "analyzed_properties": sent,
+                "high_priority_leads": high_priority,
+                "lattice_diagnostics": diagnostics,
+                "analysis_timestamp": analysis_timestamp,
+            },
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+        yield b"]," + summary[1:]
 
-    return {
-        "total_properties_found": len(properties),
-        "analyzed_properties": len(analyzed),
-        "high_priority_leads": sum(1 for item in analyzed if item.distress_signals.overall_score > 70),
-        "properties": [item.dict() for item in analyzed],
-        "lattice_diagnostics": lattice.get_triad_diagnostics(),
-        "analysis_timestamp": datetime.now().isoformat(),
-    }
+    return StreamingResponse(_stream_body(), media_type="application/json")
 
 
 @app.get("/health")
@@ -378,4 +655,14 @@ async def metrics():
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=5052)
+    # Single worker by default. Extra workers (opt-in) each keep their own scrape
+    # cache, in-flight coalescing and /health + /metrics counters; passing the
+    # app as an import string is required for multi-worker runs.
+    uvicorn.run(
+        "zillow_visual_scraper:app",
+        host="0.0.0.0",
+        port=5052,
+        workers=ZILLOW_WORKERS,
+        loop="uvloop",
+        http="httptools",
+    )